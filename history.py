@@ -0,0 +1,186 @@
+"""
+Compact, delta-encoded history of scraped communities
+
+Kept free of Selenium so downstream code can query the history without a browser.
+"""
+import json
+import os
+from datetime import datetime, timezone
+
+class HistoryStore:
+    """
+    Compact history of scraped communities: full base snapshots plus per-run deltas
+    
+    Layout of the history directory:
+    - base-<run>.json: every community record as of that run, keyed by URL
+    - deltas-<run>.jsonl: one line per later run with only the fields that changed,
+      e.g. {"run": "...", "changes": {"<url>": {"joined_count": "1.3K joined", "joined_count_value": 1300}}}
+    Each delta also lists the URLs that were "removed": in the previous snapshot but not
+    listed this run (e.g. dropped off the leaderboard). Fields missing from a listed
+    community (e.g. detail fields skipped by the request budget) keep their previous values.
+    A new base is written every rebase_every runs so reconstruction never replays
+    more than that many deltas. Runs must be recorded in chronological order.
+    """
+    
+    def __init__(self, history_dir="whop_history", rebase_every=30):
+        self.history_dir = history_dir
+        self.rebase_every = rebase_every
+        os.makedirs(history_dir, exist_ok=True)
+    
+    @staticmethod
+    def _run_id(when):
+        """Sortable run id used in file names, e.g. 20261019T004633Z"""
+        return when.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    
+    @staticmethod
+    def _as_run_id(when):
+        """Convert a date, datetime or ISO string into the latest run id it covers"""
+        if isinstance(when, str):
+            when = datetime.fromisoformat(when) if 'T' in when else datetime.strptime(when, '%Y-%m-%d').date()
+        if not isinstance(when, datetime):
+            # A bare date covers every run on that day
+            return when.strftime('%Y%m%dT235959Z')
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return HistoryStore._run_id(when)
+    
+    def _bases(self):
+        """Run ids of all base snapshots, oldest first"""
+        return sorted(
+            name[len('base-'):-len('.json')]
+            for name in os.listdir(self.history_dir)
+            if name.startswith('base-') and name.endswith('.json')
+        )
+    
+    def _base_path(self, base_id):
+        return os.path.join(self.history_dir, f"base-{base_id}.json")
+    
+    def _deltas_path(self, base_id):
+        return os.path.join(self.history_dir, f"deltas-{base_id}.jsonl")
+    
+    def _read_deltas(self, base_id):
+        """Yield the delta lines recorded on top of a base, oldest first"""
+        path = self._deltas_path(base_id)
+        if not os.path.exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    
+    def _latest_run(self, bases):
+        """Run id of the most recent base or delta, or None for an empty history"""
+        if not bases:
+            return None
+        latest = bases[-1]
+        for delta in self._read_deltas(bases[-1]):
+            latest = delta['run']
+        return latest
+    
+    def _load_base(self, base_id):
+        with open(self._base_path(base_id), 'r', encoding='utf-8') as f:
+            return json.load(f)['records']
+    
+    def _write_base(self, run_id, records):
+        # Write to a temp file first so a crash never leaves a truncated base
+        path = self._base_path(run_id)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'run': run_id, 'records': records}, f)
+        os.replace(path + '.tmp', path)
+    
+    def record_run(self, records, when=None):
+        """
+        Record one run of flattened community records
+        Args:
+            records (list): Flat community dicts, each with a 'url'
+            when (datetime, optional): Run time, defaults to now
+        Returns:
+            int: Number of communities that changed
+        Raises:
+            ValueError: If the run is not later than the last recorded run. Deltas are
+                replayed in file order, so runs can only be appended.
+        """
+        run_id = self._run_id(when or datetime.now(timezone.utc))
+        bases = self._bases()
+        
+        latest_run = self._latest_run(bases)
+        if latest_run is not None and run_id <= latest_run:
+            raise ValueError(f"Run {run_id} is not later than the last recorded run {latest_run}")
+        
+        if not bases:
+            self._write_base(run_id, {record['url']: record for record in records})
+            print(f"Wrote base history snapshot of {len(records)} communities")
+            return len(records)
+        
+        base_id = bases[-1]
+        current = self.as_of(run_id)
+        listed = {record['url'] for record in records}
+        removed = sorted(url for url in current if url not in listed)
+        changes = {}
+        for record in records:
+            previous = current.get(record['url'], {})
+            changed = {key: value for key, value in record.items() if previous.get(key) != value}
+            if changed:
+                changes[record['url']] = changed
+        
+        delta_count = sum(1 for _ in self._read_deltas(base_id))
+        if delta_count + 1 >= self.rebase_every:
+            for url in removed:
+                del current[url]
+            for url, changed in changes.items():
+                current.setdefault(url, {}).update(changed)
+            self._write_base(run_id, current)
+            print(f"Rebased history at {run_id} after {delta_count + 1} runs")
+        else:
+            with open(self._deltas_path(base_id), 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'run': run_id, 'changes': changes, 'removed': removed}) + '\n')
+            print(f"Recorded history delta for {len(changes)} of {len(records)} communities, "
+                  f"{len(removed)} removed")
+        return len(changes)
+    
+    def as_of(self, when):
+        """
+        Reconstruct every community record as it stood at a point in time
+        Args:
+            when: date, datetime or ISO string; a bare date includes all runs that day
+        Returns:
+            dict: url -> flat community record
+        """
+        run_id = self._as_run_id(when)
+        bases = [base_id for base_id in self._bases() if base_id <= run_id]
+        if not bases:
+            return {}
+        
+        records = self._load_base(bases[-1])
+        for delta in self._read_deltas(bases[-1]):
+            if delta['run'] > run_id:
+                break
+            for url in delta.get('removed', []):
+                records.pop(url, None)
+            for url, changed in delta['changes'].items():
+                records.setdefault(url, {}).update(changed)
+        return records
+    
+    def series(self, url, field):
+        """
+        Values of one field of one community over time, recorded whenever it changed
+        
+        Reads every base snapshot in full (one per rebase_every runs) plus every delta
+        line. That is cheap next to loading dated CSVs, but not indexed per community.
+        A community that dropped off the leaderboard contributes a None point.
+        Returns:
+            list: (run id, value) tuples, oldest first
+        """
+        points = []
+        for base_id in self._bases():
+            record = self._load_base(base_id).get(url, {})
+            value = record.get(field)
+            if (field in record or points) and (not points or points[-1][1] != value):
+                points.append((base_id, value))
+            for delta in self._read_deltas(base_id):
+                if url in delta.get('removed', []):
+                    points.append((delta['run'], None))
+                changed = delta['changes'].get(url, {})
+                if field in changed:
+                    points.append((delta['run'], changed[field]))
+        return points
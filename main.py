@@ -2,6 +2,11 @@ import time
 import csv
 import random
 import re
+import argparse
+import json
+import math
+from contextlib import contextmanager
+from datetime import datetime, timezone
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
@@ -9,42 +14,261 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.keys import Keys
 import os
 import sys
 from dotenv import load_dotenv
+from social_links import SOCIAL_PLATFORMS, SOCIAL_KEY_ALIASES, classify_link, is_profile_link
+from history import HistoryStore
+from parsing import parse_count
+from sqlite_sink import SQLiteSink
+
+class CrawlScheduler:
+    """
+    Orders community detail fetches by how valuable a refresh is
+    
+    Each community gets a priority from three signals, each scaled to 0..1:
+    - rank: higher Whop ranking (or leaderboard position if never scraped) scores higher
+    - movement: relative change in joined_count since the previous run
+    - staleness: age of the last full scrape, maxing out at max_age_days
+    State is persisted between runs in a JSON file keyed by community URL, together
+    with each community's last detail fields so budgeted runs can carry them forward.
+    """
+    
+    # Fields only available from a community's detail page and profile modal
+    DETAIL_FIELDS = [
+        'whop_ranking', 'founded_date', 'full_description', 'features',
+        'social_links', 'profile_social_links',
+    ]
+    
+    def __init__(self, state_file="whop_crawl_state.json", rank_weight=1.0, movement_weight=1.0,
+                 staleness_weight=1.0, max_age_days=7):
+        self.state_file = state_file
+        self.rank_weight = rank_weight
+        self.movement_weight = movement_weight
+        self.staleness_weight = staleness_weight
+        self.max_age_days = max_age_days
+        self.state = self._load_state()
+    
+    def _load_state(self):
+        """Load per-community crawl state from the previous run"""
+        if not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not read crawl state {self.state_file}, starting fresh: {e}")
+            return {}
+    
+    def save_state(self):
+        """Write per-community crawl state for the next run"""
+        with open(self.state_file, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2)
+        print(f"Saved crawl state for {len(self.state)} communities to {self.state_file}")
+    
+    def priority(self, card, now=None):
+        """Score a leaderboard card; higher means fetch sooner"""
+        now = now or datetime.now(timezone.utc)
+        previous = self.state.get(card['url'], {})
+        
+        rank = previous.get('whop_ranking') or card.get('leaderboard_position') or 1
+        rank_score = 1 / (1 + math.log10(max(rank, 1)))
+        
+        joined_now = parse_count(card.get('joined_count'))
+        joined_before = previous.get('joined_count')
+        if joined_now is None or joined_before is None:
+            movement_score = 0.0
+        else:
+            movement_score = min(abs(joined_now - joined_before) / max(joined_before, 1), 1.0)
+        
+        last_scrape = previous.get('last_full_scrape')
+        if last_scrape is None:
+            staleness_score = 1.0
+        else:
+            age_days = (now - datetime.fromisoformat(last_scrape)).total_seconds() / 86400
+            staleness_score = min(max(age_days, 0) / self.max_age_days, 1.0)
+        
+        return (self.rank_weight * rank_score
+                + self.movement_weight * movement_score
+                + self.staleness_weight * staleness_score)
+    
+    def order(self, cards):
+        """Return cards sorted from highest to lowest priority"""
+        now = datetime.now(timezone.utc)
+        return sorted(cards, key=lambda card: self.priority(card, now), reverse=True)
+    
+    def record_listing(self, card):
+        """Remember the joined_count seen on the leaderboard this run"""
+        joined = parse_count(card.get('joined_count'))
+        if joined is not None:
+            self.state.setdefault(card['url'], {})['joined_count'] = joined
+    
+    def record_full_scrape(self, community):
+        """Mark a community as fully scraped now and keep its detail fields for carry_forward()"""
+        entry = self.state.setdefault(community['url'], {})
+        entry['last_full_scrape'] = datetime.now(timezone.utc).isoformat()
+        ranking = parse_count(community.get('whop_ranking'))
+        if ranking is not None:
+            entry['whop_ranking'] = ranking
+        entry['details'] = {
+            field: community[field] for field in self.DETAIL_FIELDS if field in community
+        }
+    
+    def carry_forward(self, card):
+        """
+        Fill in detail fields from the last full scrape for a card not refreshed this run
+        Returns:
+            bool: True if previous details were found
+        """
+        details = self.state.get(card['url'], {}).get('details')
+        if not details:
+            return False
+        for field, value in details.items():
+            card.setdefault(field, value)
+        return True
+
+class Tracer:
+    """
+    Opt-in span recorder that exports Chrome trace / Perfetto JSON
+    
+    Spans nest by time on a single track, so a community shows up as a tree of
+    navigate, wait, extract and modal spans in chrome://tracing or ui.perfetto.dev.
+    When disabled, span() is a no-op.
+    """
+    
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.events = []
+        self._origin = time.perf_counter()
+    
+    @contextmanager
+    def span(self, name, **args):
+        """Record the wrapped block as a span. Yields the event dict (None when disabled)."""
+        if not self.enabled:
+            yield None
+            return
+        start = time.perf_counter()
+        event = {
+            'name': name,
+            'ph': 'X',
+            'pid': os.getpid(),
+            'tid': 1,
+            'ts': (start - self._origin) * 1_000_000,
+            'args': args,
+        }
+        try:
+            yield event
+        finally:
+            event['dur'] = (time.perf_counter() - start) * 1_000_000
+            self.events.append(event)
+    
+    def export(self, filename):
+        """Write the recorded spans as Chrome trace JSON"""
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f)
+        print(f"Saved {len(self.events)} trace spans to {filename}")
 
 class WhopTradingScraper:
-    def __init__(self, headless=False):
+    # DevTools trace categories captured with --trace-dir (the Performance panel's defaults)
+    TRACE_CATEGORIES = ','.join([
+        'devtools.timeline', 'disabled-by-default-devtools.timeline', 'blink.user_timing',
+        'loading', 'latencyInfo', 'v8.execute', 'disabled-by-default-devtools.timeline.frame',
+    ])
+    
+    def __init__(self, headless=True, debugger_address=None, use_driver_manager=False,
+                 trace_dir=None, slow_threshold=10):
+        """
+        Args:
+            headless (bool): Run Chrome without a window
+            debugger_address (str, optional): host:port of an already running Chrome started with
+                --remote-debugging-port. The browser is reused and left running on close().
+            use_driver_manager (bool): Download a matching ChromeDriver with webdriver_manager
+                instead of relying on Selenium Manager
+            trace_dir (str, optional): Enable tracing and write trace.json plus slow page captures here
+            slow_threshold (float): Seconds of page work (excluding deliberate sleeps) after which
+                a community page counts as slow and is captured
+        """
+        self.debugger_address = debugger_address
+        
         # Setup Chrome options
         self.chrome_options = Options()
-        if headless:
-            self.chrome_options.add_argument("--headless")
-        self.chrome_options.add_argument("--no-sandbox")
-        self.chrome_options.add_argument("--disable-dev-shm-usage")
-        self.chrome_options.add_argument("--disable-gpu")
-        self.chrome_options.add_argument("--window-size=1920,1080")
-        self.chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36")
+        if debugger_address:
+            # Attach to the long-lived browser; window/launch flags don't apply
+            self.chrome_options.add_experimental_option("debuggerAddress", debugger_address)
+        else:
+            if headless:
+                self.chrome_options.add_argument("--headless")
+            self.chrome_options.add_argument("--no-sandbox")
+            self.chrome_options.add_argument("--disable-dev-shm-usage")
+            self.chrome_options.add_argument("--disable-gpu")
+            self.chrome_options.add_argument("--window-size=1920,1080")
+            self.chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36")
+        
+        if trace_dir:
+            # ChromeDriver records DevTools trace events into the performance log,
+            # read back per community in _drain_trace_events()
+            self.chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+            self.chrome_options.add_experimental_option('perfLoggingPrefs', {
+                'enableNetwork': True,
+                'enablePage': True,
+                'traceCategories': self.TRACE_CATEGORIES,
+            })
         
         # Initialize the browser
-        self.driver = webdriver.Chrome(options=self.chrome_options)
+        if use_driver_manager:
+            # Imported lazily - webdriver_manager is slow to import and only needed here
+            from webdriver_manager.chrome import ChromeDriverManager
+            service = Service(ChromeDriverManager().install())
+            self.driver = webdriver.Chrome(service=service, options=self.chrome_options)
+        else:
+            self.driver = webdriver.Chrome(options=self.chrome_options)
         self.wait = WebDriverWait(self.driver, 10)
         
+        # Tracing
+        self.trace_dir = trace_dir
+        self.slow_threshold = slow_threshold
+        self.tracer = Tracer(enabled=trace_dir is not None)
+        if trace_dir:
+            os.makedirs(trace_dir, exist_ok=True)
+        
         # Data storage
         self.communities = []
+        self.communities_by_url = {}  # url -> community, used to dedupe across categories
         
         # Cookies path
         self.cookies_file = "whop_cookies.pkl"
+        self.logged_in = False
+    
+    def _is_logged_in(self):
+        """Check the header for the account button shown to logged in users"""
+        try:
+            self.driver.find_element(By.XPATH, "//header//button[contains(@class, 'rounded-full')]")
+            return True
+        except NoSuchElementException:
+            return False
     
-    def login(self, email=None):
-        """Log in to Whop and save cookies for future sessions"""
+    def login(self, email=None, interactive=True, mfa_timeout=60):
+        """
+        Log in to Whop and save cookies for future sessions
+        Args:
+            email (str, optional): Whop email, defaults to USERNAME from .env
+            interactive (bool): Fall back to the manual email + MFA flow if saved cookies
+                don't restore the session. When False, return False immediately instead.
+            mfa_timeout (int): Seconds to wait for the MFA code to be entered
+        """
         load_dotenv()
         if email is None:
             email = os.getenv('USERNAME')
         print("Starting login process...")
         self.driver.get("https://whop.com/")
         time.sleep(3)  # Let the page load
+        
+        # A reused browser (--debugger-address) may already be logged in through its profile
+        if self._is_logged_in():
+            print("Browser session is already logged in.")
+            self.logged_in = True
+            return True
 
         # Try to load cookies first
         if os.path.exists(self.cookies_file):
@@ -55,16 +279,20 @@ class WhopTradingScraper:
                 self.driver.refresh()
                 time.sleep(3)
                 # Check if already logged in
-                try:
-                    self.driver.find_element(By.XPATH, "//header//button[contains(@class, 'rounded-full')]")
+                if self._is_logged_in():
                     print("Session restored from cookies! Already logged in.")
+                    self.logged_in = True
                     return True
-                except NoSuchElementException:
-                    print("Cookies did not restore session. Proceeding with manual login...")
+                print("Cookies did not restore session.")
             else:
-                print("Failed to load cookies. Proceeding with manual login...")
+                print("Failed to load cookies.")
         else:
-            print("No cookies file found. Proceeding with manual login...")
+            print("No cookies file found.")
+        
+        if not interactive:
+            print("Saved session is invalid and interactive login is disabled. Run with --login to refresh it.")
+            return False
+        print("Proceeding with manual login...")
 
         # Manual login flow
         try:
@@ -87,15 +315,15 @@ class WhopTradingScraper:
             email_input.send_keys(email)
             email_input.send_keys(Keys.RETURN)
             print("Submitted email, waiting for MFA code input...")
-            print("Please enter the MFA code sent to your email within 60 seconds...")
-            time.sleep(60)  # Wait for user to input MFA code
-            print("Checking if login was successful...")
+            print(f"Please enter the MFA code sent to your email within {mfa_timeout} seconds...")
             try:
-                self.wait.until(
+                # Poll for the logged in header instead of sleeping the full timeout
+                WebDriverWait(self.driver, mfa_timeout).until(
                     EC.presence_of_element_located((By.XPATH, "//header//button[contains(@class, 'rounded-full')]"))
                 )
                 print("Login successful!")
                 self._save_cookies()
+                self.logged_in = True
                 return True
             except TimeoutException:
                 print("Login verification failed. Please check if MFA code was entered correctly.")
@@ -166,22 +394,24 @@ class WhopTradingScraper:
                 return False
         return False
     
-    def navigate_to_leaderboard_page(self, page_num=1):
-        """Navigate to a specific page of the Whop trading leaderboard"""
-        url = f"https://whop.com/discover/leaderboards/c/trading/p/{page_num}/"
-        print(f"Navigating to leaderboard page {page_num}: {url}")
-        self.driver.get(url)
-        time.sleep(3)  # Let the page load
+    def navigate_to_leaderboard_page(self, page_num=1, category="trading"):
+        """Navigate to a specific page of a Whop category leaderboard"""
+        url = f"https://whop.com/discover/leaderboards/c/{category}/p/{page_num}/"
+        print(f"Navigating to {category} leaderboard page {page_num}: {url}")
+        with self.tracer.span('leaderboard_navigate', url=url):
+            self.driver.get(url)
+            time.sleep(3)  # Let the page load
         
         # Check if page loaded successfully by looking for content
         try:
             #//*[@id="discover"]/div/div/div[3]/ul
-            self.wait.until(
-                EC.presence_of_element_located((By.XPATH, '//*[@id="discover"]/div/div/div[3]/ul'))
-            )
+            with self.tracer.span('leaderboard_wait', url=url):
+                self.wait.until(
+                    EC.presence_of_element_located((By.XPATH, '//*[@id="discover"]/div/div/div[3]/ul'))
+                )
             return True
         except TimeoutException:
-            print(f"Page {page_num} failed to load")
+            print(f"{category} page {page_num} failed to load")
             return False
     
     def get_community_links_from_current_page(self):
@@ -254,57 +484,92 @@ class WhopTradingScraper:
     
     def scrape_community_info(self, community_data):
         """Scrape detailed information from a single community page"""
+        if not self.tracer.enabled:
+            return self._scrape_community_page(community_data)
+        
+        # Start the browser trace for this community from an empty buffer
+        self._drain_trace_events()
+        first_event = len(self.tracer.events)
+        with self.tracer.span('community', url=community_data['url']) as span:
+            result = self._scrape_community_page(community_data)
+        trace_events = self._drain_trace_events()
+        
+        # Deliberate sleeps (rate limiting, waits for animations) are not page latency
+        slept = sum(
+            event['dur'] for event in self.tracer.events[first_event:] if event['name'] == 'sleep'
+        )
+        latency = (span['dur'] - slept) / 1_000_000
+        span['args']['latency_s'] = round(latency, 3)
+        if latency > self.slow_threshold:
+            self._capture_slow_page(community_data['url'], latency, trace_events)
+        return result
+    
+    def _sleep(self, seconds, reason):
+        """time.sleep recorded as a 'sleep' span so it can be excluded from page latency"""
+        with self.tracer.span('sleep', reason=reason):
+            time.sleep(seconds)
+    
+    def _scrape_community_page(self, community_data):
+        """Scrape a community page, returning the card data unchanged on failure"""
         print(f"Scraping: {community_data['url']}")
-        self.driver.get(community_data['url'])
-        time.sleep(random.uniform(2, 4))  # Random delay to avoid rate limiting
+        with self.tracer.span('navigate'):
+            self.driver.get(community_data['url'])
+        self._sleep(random.uniform(2, 4), 'rate limit')  # Random delay to avoid rate limiting
         
         try:
             # Wait for the page to load
-            self.wait.until(EC.presence_of_element_located((By.TAG_NAME, 'h1')))
+            with self.tracer.span('wait'):
+                self.wait.until(EC.presence_of_element_located((By.TAG_NAME, 'h1')))
             
             # Add additional information from the detailed page
-            detailed_data = {
-                **community_data,  # Include all data from the card
-                'whop_ranking': self._safe_get_text(
-                    '//span[contains(text(), "Whop Ranking")]'
-                ),
-                'founded_date': self._safe_get_text(
-                    '//span[contains(text(), "Founded")]'
-                ),
-                'full_description': self._safe_get_text(
-                    'div[role="paragraph"]'
-                ),
-                'features': self._get_features(),
-                'social_links': self._get_social_links()
-            }
+            with self.tracer.span('extract'):
+                detailed_data = {
+                    **community_data,  # Include all data from the card
+                    'whop_ranking': self._safe_get_text(
+                        '//span[contains(text(), "Whop Ranking")]'
+                    ),
+                    'founded_date': self._safe_get_text(
+                        '//span[contains(text(), "Founded")]'
+                    ),
+                    'full_description': self._safe_get_text(
+                        'div[role="paragraph"]'
+                    ),
+                    'features': self._get_features(),
+                    'social_links': self._get_social_links()
+                }
 
             # Find and click View Profile button
             try:
-                print("\nLooking for View Profile button...")
-                view_profile_btn = self.wait.until(
-                    EC.presence_of_element_located((
-                        By.XPATH, "//button[contains(text(), 'View Profile')]"
-                    ))
-                )
-                print("✓ Found View Profile button")
-                
-                # Scroll the button into view
-                self.driver.execute_script("arguments[0].scrollIntoView(true);", view_profile_btn)
-                time.sleep(1)  # Wait after scrolling
-                
-                # Click the button
-                print("Clicking View Profile button...")
-                view_profile_btn.click()
-                time.sleep(2)  # Wait for modal to load
+                with self.tracer.span('modal_open'):
+                    print("\nLooking for View Profile button...")
+                    view_profile_btn = self.wait.until(
+                        EC.presence_of_element_located((
+                            By.XPATH, "//button[contains(text(), 'View Profile')]"
+                        ))
+                    )
+                    print("✓ Found View Profile button")
+                    
+                    # Scroll the button into view
+                    with self.tracer.span('scroll'):
+                        self.driver.execute_script("arguments[0].scrollIntoView(true);", view_profile_btn)
+                        self._sleep(1, 'after scroll')  # Wait after scrolling
+                    
+                    # Click the button
+                    print("Clicking View Profile button...")
+                    with self.tracer.span('click'):
+                        view_profile_btn.click()
+                        self._sleep(2, 'modal load')  # Wait for modal to load
                 
                 # Get profile social links
-                profile_links = self._get_profile_social_links()
+                with self.tracer.span('modal_extract'):
+                    profile_links = self._get_profile_social_links()
                 if profile_links:
                     detailed_data['profile_social_links'] = profile_links
                 
                 # Close the modal by pressing escape
-                webdriver.ActionChains(self.driver).send_keys(Keys.ESCAPE).perform()
-                time.sleep(1)  # Wait for modal to close
+                with self.tracer.span('modal_close'):
+                    webdriver.ActionChains(self.driver).send_keys(Keys.ESCAPE).perform()
+                    self._sleep(1, 'modal close')  # Wait for modal to close
                 
             except Exception as e:
                 print(f"❌ Error with View Profile button: {e}")
@@ -319,6 +584,42 @@ class WhopTradingScraper:
             print(f"Error scraping {community_data['url']}: {e}")
             return community_data
     
+    def _drain_trace_events(self):
+        """Read and clear the browser's performance log, returning its DevTools trace events"""
+        trace_events = []
+        try:
+            entries = self.driver.get_log('performance')
+        except Exception as e:
+            print(f"❌ Could not read browser trace: {e}")
+            return trace_events
+        for entry in entries:
+            message = json.loads(entry['message'])['message']
+            if message.get('method') == 'Tracing.dataCollected':
+                trace_events.append(message['params'])
+        return trace_events
+    
+    def _capture_slow_page(self, url, seconds, trace_events):
+        """Save an HTML snapshot and the browser's DevTools trace for a slow community page"""
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', url.split('whop.com', 1)[-1]).strip('-') or 'page'
+        base = os.path.join(self.trace_dir, f"slow-{slug}-{int(time.time())}")
+        print(f"⚠ {url} took {seconds:.1f}s excluding sleeps, saving snapshot to {base}.*")
+        try:
+            with open(f"{base}.html", 'w', encoding='utf-8') as f:
+                f.write(self.driver.page_source)
+            # Chrome trace format; loads in Perfetto and the DevTools Performance panel
+            with open(f"{base}.trace.json", 'w', encoding='utf-8') as f:
+                json.dump({
+                    'traceEvents': trace_events,
+                    'metadata': {'url': url, 'latency_s': seconds},
+                }, f)
+        except Exception as e:
+            print(f"❌ Could not capture slow page {url}: {e}")
+    
+    def save_trace(self):
+        """Write recorded spans to trace.json in the trace directory"""
+        if self.tracer.enabled:
+            self.tracer.export(os.path.join(self.trace_dir, 'trace.json'))
+    
     def _safe_get_text(self, selector):
         """Safely get text from an element, return empty string if not found"""
         try:
@@ -366,82 +667,23 @@ class WhopTradingScraper:
         return features
     
     def _get_social_links(self):
-        """Get social media links from community page"""
+        """Get social media links from the community's content on its page"""
         social_links = {}
-        try:
-            link_elements = self.driver.find_elements(
-                By.XPATH, '//a[contains(@href, "discord.com") or contains(@href, "twitter.com")]'
-            )
-            for element in link_elements:
-                href = element.get_attribute('href')
-                if 'discord.com' in href:
-                    social_links['discord'] = href
-                elif 'twitter.com' in href:
-                    social_links['twitter'] = href
-        except NoSuchElementException:
-            pass
+        # Pull every href in one round trip rather than one get_attribute call per anchor.
+        # Only look inside the page content; the site header, nav and footer link Whop's own accounts.
+        hrefs = self.driver.execute_script("""
+            const root = document.querySelector('main') || document.body;
+            return Array.from(root.querySelectorAll('a[href]'))
+                .filter(a => !a.closest('header, nav, footer, [role="dialog"]'))
+                .map(a => a.href);
+        """) or []
+        for href in hrefs:
+            platform, url = classify_link(href)
+            # Ordinary links, share buttons and Whop's own handles are not the community's links
+            if platform not in (None, 'website') and is_profile_link(url):
+                social_links.setdefault(platform, url)
         return social_links
     
-    def get_profile_links(self):
-        """Find and click View Profile buttons to get social links"""
-        try:
-            # Find all View Profile buttons
-            profile_buttons = self.driver.find_elements(
-                By.XPATH, "//button[contains(text(), 'View Profile')]"
-            )
-            
-            print(f"Found {len(profile_buttons)} View Profile buttons")
-            social_data = {}
-            
-            for i, button in enumerate(profile_buttons, 1):
-                try:
-                    print(f"\nProcessing profile button {i}/{len(profile_buttons)}")
-                    
-                    # Get the parent card to extract community name
-                    card = button.find_element(By.XPATH, "./ancestor::div[contains(@class, 'rounded-xl')]")
-                    community_name = card.find_element(By.XPATH, ".//span[contains(@class, 'fui-Text')]/span").text
-                    print(f"Processing community: {community_name}")
-                    
-                    # Scroll the button into view
-                    self.driver.execute_script("arguments[0].scrollIntoView(true);", button)
-                    time.sleep(1)  # Increased delay after scrolling
-                    
-                    # Click the View Profile button
-                    print("Clicking View Profile button...")
-                    button.click()
-                    time.sleep(2)  # Wait for profile modal to load
-                    
-                    # Get all social links from the profile
-                    print("Extracting social links...")
-                    social_links = self._get_profile_social_links()
-                    
-                    if social_links:
-                        social_data[community_name] = social_links
-                        print(f"Successfully found social links for {community_name}")
-                    else:
-                        print(f"No social links found for {community_name}")
-                    
-                    # Close the profile modal by clicking escape
-                    print("Closing profile modal...")
-                    webdriver.ActionChains(self.driver).send_keys(Keys.ESCAPE).perform()
-                    time.sleep(1.5)  # Increased wait for modal to close
-                    
-                except Exception as e:
-                    print(f"Error processing profile button: {e}")
-                    # Try to close modal if it's still open
-                    try:
-                        webdriver.ActionChains(self.driver).send_keys(Keys.ESCAPE).perform()
-                    except:
-                        pass
-                    continue
-            
-            print(f"\nCompleted processing all profiles. Found data for {len(social_data)} communities")
-            return social_data
-                
-        except Exception as e:
-            print(f"Error finding profile buttons: {e}")
-            return {}
-    
     def _get_profile_social_links(self):
         """Extract social media links from an open profile modal"""
         social_links = {}
@@ -450,11 +692,12 @@ class WhopTradingScraper:
             
             # First try to find the main container with the specific class
             print("Looking for main container...")
-            main_container = self.wait.until(
-                EC.presence_of_element_located((
-                    By.CSS_SELECTOR, 'div[class*="relative mt-[22px]"]'
-                ))
-            )
+            with self.tracer.span('wait_container'):
+                main_container = self.wait.until(
+                    EC.presence_of_element_located((
+                        By.CSS_SELECTOR, 'div[class*="relative mt-[22px]"]'
+                    ))
+                )
             print("✓ Found main container")
             
             # Get username info
@@ -510,47 +753,12 @@ class WhopTradingScraper:
                         
                         if href:
                             # Determine the platform from href and aria-label
-                            platform = None
-                            
-                            # Check common social media platforms in the URL
-                            if 'twitter.com' in href or 'x.com' in href:
-                                platform = 'twitter'
-                            elif 'instagram.com' in href:
-                                platform = 'instagram'
-                            elif 'youtube.com' in href or 'youtu.be' in href:
-                                platform = 'youtube'
-                            elif 'tiktok.com' in href:
-                                platform = 'tiktok'
-                            elif 'facebook.com' in href or 'fb.com' in href:
-                                platform = 'facebook'
-                            elif 'discord' in href:
-                                platform = 'discord'
-                            else:
-                                # Try to get platform from aria-label
-                                if aria_label:
-                                    label = aria_label.lower()
-                                    if any(x in label for x in ['twitter', 'x.com']):
-                                        platform = 'twitter'
-                                    elif 'instagram' in label:
-                                        platform = 'instagram'
-                                    elif 'youtube' in label:
-                                        platform = 'youtube'
-                                    elif 'tiktok' in label:
-                                        platform = 'tiktok'
-                                    elif 'facebook' in label:
-                                        platform = 'facebook'
-                                    elif 'discord' in label:
-                                        platform = 'discord'
-                                    else:
-                                        platform = 'website'
-                                else:
-                                    platform = 'website'
-                            
+                            platform, url = classify_link(href, aria_label)
                             if platform:
-                                social_links[platform] = href
-                                print(f"✓ Added {platform} link: {href}")
+                                social_links[platform] = url
+                                print(f"✓ Added {platform} link: {url}")
                             else:
-                                print(f"❌ Could not determine platform for: {href}")
+                                print(f"❌ Not a web link, skipping: {href}")
                         else:
                             print("❌ No href found for this link")
                                 
@@ -587,13 +795,8 @@ class WhopTradingScraper:
         
         return social_links
     
-    def scrape_all_communities(self, max_pages=None):
-        """
-        Scrape communities from the leaderboard
-        Args:
-            max_pages (int, optional): Maximum number of pages to scrape. If None, scrapes all pages.
-        """
-        # Try to load cookies first
+    def _restore_session(self):
+        """Load saved cookies into the browser and report whether the session is valid"""
         try:
             print("Checking for saved session...")
             cookies_loaded = self._load_cookies()
@@ -604,66 +807,194 @@ class WhopTradingScraper:
                 time.sleep(3)
                 
                 # Verify login status after loading cookies
-                try:
-                    self.driver.find_element(By.XPATH, "//header//button[contains(@class, 'rounded-full')]")
+                if self._is_logged_in():
                     print("Session restoration successful - user is logged in!")
-                except NoSuchElementException:
+                else:
                     print("Session restoration failed - cookies did not restore login state.")
             else:
                 print("No saved session found or cookies couldn't be loaded.")
         except Exception as e:
             print(f"Error loading session: {e}")
+    
+    def collect_leaderboard_page(self, category, page_num, position_offset=0):
+        """
+        Collect the community cards listed on one page of a category leaderboard
+        
+        New communities are added to self.communities with their card data; communities
+        already seen in another category are only tagged with this category.
+        Args:
+            category (str): Leaderboard category slug
+            page_num (int): Leaderboard page number
+            position_offset (int): Number of communities listed on earlier pages of this category
+        Returns:
+            tuple: (cards first seen on this page, number of communities listed on the page).
+                The count is 0 once the category is exhausted.
+        """
+        print(f"\nProcessing {category} page {page_num}")
+        
+        # Try to navigate to the page
+        if not self.navigate_to_leaderboard_page(page_num, category):
+            print(f"No more {category} pages found after page {page_num - 1}")
+            return [], 0
         
-        page_num = 1
-        all_community_data = []
-        all_social_data = {}
+        # Get community links from current page
+        page_links = self.get_community_links_from_current_page()
         
-        while True:
-            print(f"\nProcessing page {page_num}")
+        if not page_links:
+            print(f"No communities found on {category} page {page_num}, stopping pagination")
+            return [], 0
+        
+        new_cards = []
+        for position, link in enumerate(page_links, 1):
+            # Communities listed in more than one category are only scraped once
+            existing = self.communities_by_url.get(link['url'])
+            if existing is not None:
+                if category not in existing['categories']:
+                    existing['categories'].append(category)
+                print(f"Already listed {existing['name']}, tagging with category {category}")
+                continue
             
-            # Check if we've reached the max pages
-            if max_pages and page_num > max_pages:
-                print(f"Reached maximum pages limit of {max_pages}")
-                break
+            link['categories'] = [category]
+            link['leaderboard_position'] = position_offset + position
+            self.communities.append(link)
+            self.communities_by_url[link['url']] = link
+            new_cards.append(link)
+        
+        return new_cards, len(page_links)
+    
+    def scrape_categories(self, categories, max_pages=None, scheduler=None,
+                          time_budget=None, request_budget=None):
+        """
+        Scrape several category leaderboards in one session
+        
+        Runs in two phases. First the leaderboards are listed round-robin, one page at a
+        time, so every category makes progress under the same browser session and request
+        delays. Then community detail and profile pages are fetched in priority order until
+        the budget runs out; communities left over keep their leaderboard card data.
+        Args:
+            categories (list): Category slugs, e.g. ['trading', 'sports-betting']
+            max_pages (int, optional): Maximum number of pages per category. If None, scrapes all pages.
+            scheduler (CrawlScheduler, optional): Priority scheduler, defaults to one using whop_crawl_state.json
+            time_budget (float, optional): Seconds to spend on detail fetches
+            request_budget (int, optional): Maximum number of detail fetches
+        """
+        scheduler = scheduler or CrawlScheduler()
+        
+        # login() already validated the session; only restore it for library callers that skipped it
+        if not self.logged_in:
+            self._restore_session()
+        
+        next_page = {category: 1 for category in categories}
+        listed = {category: 0 for category in categories}
+        active = list(categories)
+        cards = []
+        
+        while active:
+            for category in list(active):
+                page_num = next_page[category]
+                
+                # Check if we've reached the max pages
+                if max_pages and page_num > max_pages:
+                    print(f"Reached maximum pages limit of {max_pages} for {category}")
+                    active.remove(category)
+                    continue
+                
+                page_cards, page_count = self.collect_leaderboard_page(category, page_num, listed[category])
+                if not page_count:
+                    active.remove(category)
+                    continue
+                cards.extend(page_cards)
+                listed[category] += page_count
                 
-            # Try to navigate to the page
-            if not self.navigate_to_leaderboard_page(page_num):
-                print(f"No more pages found after page {page_num - 1}")
+                next_page[category] = page_num + 1
+                # Add delay between pages
+                time.sleep(random.uniform(2, 4))
+        
+        for category in categories:
+            print(f"{category}: crawled {next_page[category] - 1} pages")
+        
+        # Order before recording this run's listings so movement compares against the previous run
+        ordered = scheduler.order(cards)
+        for card in cards:
+            scheduler.record_listing(card)
+        
+        # Fetch details for the highest-value communities first
+        started = time.monotonic()
+        fetched = 0
+        refreshed = set()
+        for card in ordered:
+            if request_budget is not None and fetched >= request_budget:
+                print(f"Request budget of {request_budget} detail fetches used up")
                 break
-            
-            # Get community links from current page
-            page_links = self.get_community_links_from_current_page()
-            
-            if not page_links:
-                print(f"No communities found on page {page_num}, stopping pagination")
+            if time_budget is not None and time.monotonic() - started >= time_budget:
+                print(f"Time budget of {time_budget}s used up")
                 break
             
-            # Get social links from profile sections
-            page_social_data = self.get_profile_links()
-            all_social_data.update(page_social_data)
-            
-            # Scrape each community page
-            for link in page_links:
-                community_data = self.scrape_community_info(link)
-                if community_data:
-                    # Add social data if available
-                    if community_data['name'] in all_social_data:
-                        community_data['profile_social_links'] = all_social_data[community_data['name']]
-                    self.communities.append(community_data)
-                    print(f"Successfully scraped: {community_data['name']}")
-                
-                # Add random delay between requests
-                time.sleep(random.uniform(1, 3))
+            community_data = self.scrape_community_info(card)
+            fetched += 1
+            if community_data is not card:
+                # scrape_community_info returns the card itself when the detail page failed
+                card.update(community_data)
+                scheduler.record_full_scrape(card)
+                refreshed.add(card['url'])
+                print(f"Successfully scraped: {card['name']}")
             
-            page_num += 1
-            # Add delay between pages
-            time.sleep(random.uniform(2, 4))
+            # Add random delay between requests
+            time.sleep(random.uniform(1, 3))
+        
+        # Communities skipped by the budget (or whose detail page failed) keep their last details
+        carried = sum(
+            1 for card in cards
+            if card['url'] not in refreshed and scheduler.carry_forward(card)
+        )
         
-        print(f"Completed scraping {len(self.communities)} communities across {page_num - 1} pages")
+        scheduler.save_state()
+        print(f"Fetched details for {fetched} of {len(cards)} communities, "
+              f"carried forward previous details for {carried}")
+        print(f"Completed scraping {len(self.communities)} unique communities across {len(categories)} categories")
     
-    def save_to_csv(self, filename="whop_trading_communities.csv"):
-        """Save the scraped data to a CSV file with organized columns"""
-        if not self.communities:
+    def scrape_all_communities(self, max_pages=None, category="trading"):
+        """
+        Scrape communities from a single category leaderboard
+        Args:
+            max_pages (int, optional): Maximum number of pages to scrape. If None, scrapes all pages.
+            category (str): Leaderboard category slug
+        """
+        self.scrape_categories([category], max_pages=max_pages)
+    
+    def _flatten_community(self, community):
+        """Flatten a community into the single-level record written as one CSV row"""
+        flat_community = {}
+        
+        # Process basic fields
+        for key, value in community.items():
+            if key == 'categories':
+                flat_community[key] = ';'.join(value)
+            elif key != 'profile_social_links' and not isinstance(value, dict):
+                flat_community[key] = value
+        
+        # Process profile social links
+        if 'profile_social_links' in community:
+            social_links = community['profile_social_links']
+            for key, value in social_links.items():
+                # Map social media platforms to standardized names
+                key = SOCIAL_KEY_ALIASES.get(key, key)
+                if key in SOCIAL_PLATFORMS or key in ['username', 'join_date', 'bio']:
+                    flat_community[f'profile_social_links_{key}'] = value
+        
+        return flat_community
+    
+    def save_to_csv(self, filename="whop_trading_communities.csv", category=None):
+        """
+        Save the scraped data to a CSV file with organized columns
+        Args:
+            filename (str): Output CSV path
+            category (str, optional): Only write communities listed in this category
+        """
+        communities = self.communities
+        if category is not None:
+            communities = [c for c in communities if category in c.get('categories', [])]
+        if not communities:
             print("No data to save.")
             return
         
@@ -678,7 +1009,8 @@ class WhopTradingScraper:
                 'joined_count',
                 'minutes_spent',
                 'founded_date',
-                'whop_ranking'
+                'whop_ranking',
+                'categories'
             ],
             'Rating': [
                 'rating_stars',
@@ -694,50 +1026,12 @@ class WhopTradingScraper:
                 'profile_social_links_bio'
             ],
             'Social Links': [
-                'profile_social_links_twitter',
-                'profile_social_links_x',
-                'profile_social_links_instagram',
-                'profile_social_links_youtube',
-                'profile_social_links_tiktok',
-                'profile_social_links_facebook',
-                'profile_social_links_discord',
-                'profile_social_links_website'
+                f'profile_social_links_{platform}' for platform in SOCIAL_PLATFORMS
             ]
         }
         
         # Flatten and organize the data
-        flattened_data = []
-        for community in self.communities:
-            flat_community = {}
-            
-            # Process basic fields
-            for key, value in community.items():
-                if key != 'profile_social_links' and not isinstance(value, dict):
-                    flat_community[key] = value
-            
-            # Process profile social links
-            if 'profile_social_links' in community:
-                social_links = community['profile_social_links']
-                for key, value in social_links.items():
-                    # Map social media platforms to standardized names
-                    if key in ['twitter', 'x']:
-                        flat_community['profile_social_links_twitter'] = value
-                    elif key == 'instagram':
-                        flat_community['profile_social_links_instagram'] = value
-                    elif key in ['youtube', 'yt']:
-                        flat_community['profile_social_links_youtube'] = value
-                    elif key == 'tiktok':
-                        flat_community['profile_social_links_tiktok'] = value
-                    elif key == 'facebook':
-                        flat_community['profile_social_links_facebook'] = value
-                    elif key == 'discord':
-                        flat_community['profile_social_links_discord'] = value
-                    elif key in ['website', 'url']:
-                        flat_community['profile_social_links_website'] = value
-                    elif key in ['username', 'join_date', 'bio']:
-                        flat_community[f'profile_social_links_{key}'] = value
-            
-            flattened_data.append(flat_community)
+        flattened_data = [self._flatten_community(community) for community in communities]
         
         # Get all unique columns while maintaining order from column_groups
         fieldnames = []
@@ -764,51 +1058,168 @@ class WhopTradingScraper:
         
         print(f"Data saved to {filename} with organized columns")
     
+    def save_to_history(self, history_dir="whop_history"):
+        """Record this run in the compact history store instead of a dated CSV copy"""
+        if not self.communities:
+            print("No data to record.")
+            return
+        records = []
+        for community in self.communities:
+            record = self._flatten_community(community)
+            # Numeric count next to the '1.2K joined' display text so series() can be plotted
+            record['joined_count_value'] = parse_count(record.get('joined_count'))
+            records.append(record)
+        HistoryStore(history_dir).record_run(records)
+    
+    def save_to_sqlite(self, db_path="whop_communities.db"):
+        """Upsert the scraped communities into a SQLite database"""
+        if not self.communities:
+            print("No data to save.")
+            return
+        sink = SQLiteSink(db_path)
+        try:
+            sink.upsert_communities(self.communities)
+        finally:
+            sink.close()
+    
+    def save_per_category_csv(self, categories):
+        """Save one CSV per category, e.g. whop_trading_communities.csv"""
+        for category in categories:
+            self.save_to_csv(f"whop_{category}_communities.csv", category=category)
+    
     def close(self):
-        """Close the browser"""
-        self.driver.quit()
+        """Close the browser, or just detach from it if it is a shared long-lived instance"""
+        if self.debugger_address:
+            # Stop our chromedriver but leave the shared browser running for the next run
+            self.driver.service.stop()
+        else:
+            self.driver.quit()
 
-def main():
-    # Parse command-line argument for max_pages
-    if len(sys.argv) > 1:
-        try:
-            max_pages = int(sys.argv[1])
-        except ValueError:
-            print(f"Invalid argument for max_pages: {sys.argv[1]}. Using default of 300.")
-            max_pages = 300
-    else:
-        max_pages = 300
+def parse_args(argv=None):
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description="Scrape Whop leaderboard communities into CSV files")
+    parser.add_argument(
+        "max_pages", nargs="?", type=int, default=300,
+        help="Maximum number of leaderboard pages per category (default: 300)"
+    )
+    parser.add_argument(
+        "--category", dest="categories", action="append", metavar="SLUG",
+        help="Leaderboard category slug to crawl; repeat for several (default: trading)"
+    )
+    parser.add_argument(
+        "--time-budget", type=float, default=None, metavar="SECONDS",
+        help="Stop fetching community detail pages after this many seconds"
+    )
+    parser.add_argument(
+        "--request-budget", type=int, default=None, metavar="N",
+        help="Fetch at most N community detail pages, highest priority first"
+    )
+    parser.add_argument(
+        "--state-file", default="whop_crawl_state.json",
+        help="Crawl state used to prioritise detail fetches (default: whop_crawl_state.json)"
+    )
+    parser.add_argument(
+        "--history-dir", default=None,
+        help="Also record this run as a delta in a history store directory (e.g. whop_history)"
+    )
+    parser.add_argument(
+        "--sqlite", default=None, metavar="DB_PATH",
+        help="Also upsert results into a SQLite database (e.g. whop_communities.db)"
+    )
+    parser.add_argument(
+        "--trace-dir", default=None,
+        help="Record a span trace (trace.json, Chrome trace format) and slow page captures in this directory"
+    )
+    parser.add_argument(
+        "--slow-threshold", type=float, default=10, metavar="SECONDS",
+        help="With --trace-dir, save an HTML snapshot and browser trace for pages whose work, "
+             "excluding deliberate sleeps, took longer than this (default: 10)"
+    )
+    parser.add_argument(
+        "--headed", action="store_true",
+        help="Show the browser window (headless by default)"
+    )
+    parser.add_argument(
+        "--login", action="store_true",
+        help="Allow the interactive email + MFA login flow if saved cookies are invalid (implies --headed)"
+    )
+    parser.add_argument(
+        "--email", default=None,
+        help="Whop email for interactive login (default: USERNAME from .env)"
+    )
+    parser.add_argument(
+        "--debugger-address", default=None, metavar="HOST:PORT",
+        help="Reuse a running Chrome started with --remote-debugging-port instead of launching one"
+    )
+    parser.add_argument(
+        "--driver-manager", action="store_true",
+        help="Install ChromeDriver with webdriver_manager instead of Selenium Manager"
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Run the scraper. Returns the process exit code."""
+    args = parse_args(argv)
+    categories = args.categories or ["trading"]
 
-    scraper = WhopTradingScraper(headless=False)  # Set to True for headless mode
+    scraper = WhopTradingScraper(
+        headless=not (args.headed or args.login),
+        debugger_address=args.debugger_address,
+        use_driver_manager=args.driver_manager,
+        trace_dir=args.trace_dir,
+        slow_threshold=args.slow_threshold,
+    )
     
     try:
-        # Only call login; it will handle cookies and prompt for email if needed
-        login_success = False
-        max_attempts = 3
-        attempts = 0
-        while not login_success and attempts < max_attempts:
-            attempts += 1
-            login_success = scraper.login(None)  # Pass None, let login() prompt if needed
-            if not login_success and attempts < max_attempts:
-                print(f"Login failed. You have {max_attempts - attempts} attempts remaining.")
-        
-        if login_success:
-            # Run the scraping process
-            scraper.scrape_all_communities(max_pages=max_pages)
-            
-            # Save the data
-            scraper.save_to_csv()
-            
-            print("Scraping completed successfully!")
+        if args.login:
+            login_success = False
+            max_attempts = 3
+            attempts = 0
+            while not login_success and attempts < max_attempts:
+                attempts += 1
+                login_success = scraper.login(args.email)  # login() prompts for email if needed
+                if not login_success and attempts < max_attempts:
+                    print(f"Login failed. You have {max_attempts - attempts} attempts remaining.")
         else:
-            print("Failed to log in after multiple attempts. Cannot proceed with scraping.")
+            # Non-interactive: fail fast if the saved session is no good
+            login_success = scraper.login(args.email, interactive=False)
+        
+        if not login_success:
+            print("Failed to log in. Cannot proceed with scraping.")
+            return 1
+        
+        # Run the scraping process
+        scraper.scrape_categories(
+            categories,
+            max_pages=args.max_pages,
+            scheduler=CrawlScheduler(args.state_file),
+            time_budget=args.time_budget,
+            request_budget=args.request_budget,
+        )
+        
+        # Save the data
+        if len(categories) > 1:
+            scraper.save_to_csv("whop_communities.csv")
+            scraper.save_per_category_csv(categories)
+        else:
+            scraper.save_to_csv(f"whop_{categories[0]}_communities.csv")
+        if args.history_dir:
+            scraper.save_to_history(args.history_dir)
+        if args.sqlite:
+            scraper.save_to_sqlite(args.sqlite)
+        
+        print("Scraping completed successfully!")
+        return 0
     except Exception as e:
         print(f"An error occurred: {e}")
         import traceback
         traceback.print_exc()
+        return 1
     finally:
+        # Keep whatever trace was recorded, even if the run failed
+        scraper.save_trace()
         # Always close the browser
         scraper.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
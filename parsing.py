@@ -0,0 +1,58 @@
+"""
+Parsing of the display text scraped from Whop (counts, rankings, price badges)
+
+Kept free of Selenium so the SQLite sink and history code can use it without a browser.
+"""
+import re
+
+def parse_count(text):
+    """Parse a count like '1.2K joined' or 'Whop Ranking #12' into an int, or None"""
+    match = re.search(r'(\d[\d,]*(?:\.\d+)?)\s*([KkMm]?)', text or '')
+    if not match:
+        return None
+    value = float(match.group(1).replace(',', ''))
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(match.group(2).lower(), 1)
+    return int(value * multiplier)
+
+# Months covered by one billing period, used to normalize prices to a monthly rate
+_BILLING_MONTHS = {'day': 12 / 365, 'week': 12 / 52, 'month': 1, 'year': 12}
+
+_CURRENCY_AMOUNT = re.compile(r'[$€£]\s*(\d[\d,]*(?:\.\d+)?)')
+_PLAIN_AMOUNT = re.compile(r'\b(\d[\d,]*(?:\.\d+)?)\b(?!\s*-?\s*(?:day|week|month|year)s?\b)', re.IGNORECASE)
+
+def parse_price(text):
+    """
+    Parse a price badge like '$49.99/month', '$499 / year', '$30 every 3 months' or '$99 one-time'
+    Returns:
+        tuple: (price, billing_period, monthly_price). billing_period is e.g. 'month', 'year',
+            '3 months', 'one_time' or 'free'; monthly_price is None when it can't be normalized
+            (one-time or unknown period). Unparseable badges give (None, None, None).
+            Free-trial wording is ignored when the badge also has a price.
+    """
+    if not text:
+        return None, None, None
+    lowered = text.lower()
+    # Prefer an amount with a currency symbol; otherwise the first number that isn't a
+    # trial length like '7 days' in '$49/month · 7 days free'
+    match = _CURRENCY_AMOUNT.search(text) or _PLAIN_AMOUNT.search(text)
+    if not match:
+        # Only a badge with no price at all is free; 'Free trial, then $49/month' is not
+        return (0.0, 'free', 0.0) if 'free' in lowered else (None, None, None)
+    price = float(match.group(1).replace(',', ''))
+    
+    if re.search(r'one[- ]?time|lifetime', lowered):
+        return price, 'one_time', None
+    period = re.search(
+        r'(?:/|per|every|each)\s*(\d+)?\s*(day|week|month|mo\b|year|yr\b)|\b(daily|weekly|monthly|yearly|annual)',
+        lowered[match.end():],
+    )
+    if not period:
+        return price, None, None
+    if period.group(3):
+        unit = {'daily': 'day', 'weekly': 'week', 'monthly': 'month', 'yearly': 'year', 'annual': 'year'}[period.group(3)]
+        count = 1
+    else:
+        unit = {'mo': 'month', 'yr': 'year'}.get(period.group(2), period.group(2))
+        count = int(period.group(1) or 1)
+    billing_period = unit if count == 1 else f"{count} {unit}s"
+    return price, billing_period, round(price / (count * _BILLING_MONTHS[unit]), 2)
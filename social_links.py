@@ -0,0 +1,132 @@
+"""
+Social link classification shared by the page extractors and the CSV/SQLite writers
+
+Kept free of Selenium so it can be imported and tested without a browser.
+"""
+import re
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Domain -> platform index used to classify every social link. Subdomains match
+# by suffix, so m.youtube.com and mobile.twitter.com resolve without extra entries.
+SOCIAL_DOMAINS = {
+    'twitter.com': 'twitter',
+    'x.com': 'twitter',
+    'discord.com': 'discord',
+    'discord.gg': 'discord',
+    'discordapp.com': 'discord',
+    'instagram.com': 'instagram',
+    'instagr.am': 'instagram',
+    'youtube.com': 'youtube',
+    'youtu.be': 'youtube',
+    'tiktok.com': 'tiktok',
+    'facebook.com': 'facebook',
+    'fb.com': 'facebook',
+    'fb.me': 'facebook',
+    'm.me': 'facebook',
+    't.me': 'telegram',
+    'telegram.me': 'telegram',
+    'telegram.org': 'telegram',
+}
+
+# Every platform column, in CSV order; 'website' is the fallback for unknown domains
+SOCIAL_PLATFORMS = ['twitter', 'instagram', 'youtube', 'tiktok', 'facebook', 'discord', 'telegram', 'website']
+
+# Other keys a platform has been stored under
+SOCIAL_KEY_ALIASES = {'x': 'twitter', 'yt': 'youtube', 'url': 'website'}
+
+# Whop's own accounts, linked from the site chrome on every page rather than by a community
+SITE_HANDLES = {'whop', '@whop', 'whopio', '@whopio', 'whophq', '@whophq', 'whopcom', '@whopcom'}
+
+# Fallback when the URL is a redirect or unknown domain but the aria-label names the platform
+_SOCIAL_LABEL_PATTERN = re.compile(
+    r'(?P<twitter>twitter|\bx\b)|(?P<discord>discord)|(?P<instagram>instagram)|(?P<youtube>youtube)'
+    r'|(?P<tiktok>tiktok)|(?P<facebook>facebook)|(?P<telegram>telegram)',
+    re.IGNORECASE,
+)
+
+# Host prefixes and query parameters that don't change what a link points to
+_HOST_PREFIXES = ('www.', 'm.', 'mobile.')
+_TRACKING_PARAMS = re.compile(r'^(utm_\w+|fbclid|gclid|igshid|igsh|si|ref|ref_src)$')
+
+# Paths that share the current page rather than point at an account
+_SHARE_PATH = re.compile(r'^/(intent|share|sharer|sharer\.php|dialog/share|home)(/|$)', re.IGNORECASE)
+
+def _platform_for_host(host):
+    """Look up a host in SOCIAL_DOMAINS by its longest matching domain suffix"""
+    labels = host.split('.')
+    for i in range(len(labels) - 1):
+        platform = SOCIAL_DOMAINS.get('.'.join(labels[i:]))
+        if platform:
+            return platform
+    return None
+
+def canonicalize_url(href):
+    """
+    Normalize a link so the same profile always produces the same URL
+
+    Only absolute http(s) URLs are rewritten; anything else (mailto:, javascript:,
+    relative paths) is returned unchanged. Forces https, lowercases the host, drops
+    www./m./mobile. prefixes of social domains, tracking parameters, fragments and
+    trailing slashes, and rewrites short forms (twitter.com -> x.com,
+    youtu.be/ID -> youtube.com/watch?v=ID, discord.com/invite/CODE -> discord.gg/CODE).
+    """
+    href = href.strip()
+    parts = urlsplit(href)
+    if parts.scheme.lower() not in ('http', 'https') or not parts.hostname:
+        return href
+
+    host = parts.hostname.lower()
+    for prefix in _HOST_PREFIXES:
+        # Only strip when what remains is a known social domain (m.me must stay m.me)
+        if host.startswith(prefix) and host not in SOCIAL_DOMAINS and _platform_for_host(host[len(prefix):]):
+            host = host[len(prefix):]
+            break
+    path = parts.path.rstrip('/')
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _TRACKING_PARAMS.match(k)]
+
+    platform = _platform_for_host(host)
+    if platform == 'twitter':
+        # Profile and share links carry only share-tracking parameters (s=, t=)
+        host, query = 'x.com', []
+    elif host == 'youtu.be' and path:
+        host, query, path = 'youtube.com', [('v', path.lstrip('/'))] + query, '/watch'
+    elif platform == 'discord' and path.startswith('/invite/'):
+        host, path = 'discord.gg', path[len('/invite'):]
+    elif host == 'discordapp.com':
+        host = 'discord.com'
+
+    return urlunsplit(('https', host, path, urlencode(query), ''))
+
+def classify_link(href, label=None):
+    """
+    Identify the platform of a link
+    Args:
+        href (str): Link URL
+        label (str, optional): aria-label or link text, used when the domain is unknown
+    Returns:
+        tuple: (platform, canonical URL). platform is 'website' for unrecognised web
+            links and None for links that aren't http(s) URLs (mailto:, relative, ...).
+    """
+    url = canonicalize_url(href)
+    host = urlsplit(url).hostname if url.startswith('https://') else None
+    if not host:
+        return None, url
+    platform = _platform_for_host(host)
+    if platform is None and label:
+        match = _SOCIAL_LABEL_PATTERN.search(label)
+        if match:
+            platform = match.lastgroup
+    return platform or 'website', url
+
+def is_profile_link(url):
+    """
+    Check whether a canonical social URL points at an account of the community
+
+    Rejects share/intent links (x.com/intent/tweet, facebook.com/sharer.php, ...),
+    bare domains and Whop's own accounts.
+    """
+    path = urlsplit(url).path
+    if not path.strip('/') or _SHARE_PATH.match(path):
+        return False
+    handle = path.strip('/').split('/')[0].lower()
+    return handle not in SITE_HANDLES
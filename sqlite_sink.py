@@ -0,0 +1,253 @@
+"""
+SQLite sink and query API for scraped communities
+
+Kept free of Selenium so downstream services can read the database without a browser.
+"""
+import sqlite3
+from datetime import datetime, timezone
+
+from parsing import parse_count, parse_price
+from social_links import SOCIAL_PLATFORMS, SOCIAL_KEY_ALIASES
+
+class SQLiteSink:
+    """
+    Normalized SQLite store of scraped communities for downstream lookups
+    
+    Tables: communities (one row per URL), community_categories, community_features
+    and social_links.
+    Writes are batched upserts keyed by URL; fields a run didn't fetch (e.g. detail
+    pages skipped by the budget) keep their stored values. The database runs in WAL
+    mode so readers are never blocked by a crawl in progress.
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS communities (
+            url TEXT PRIMARY KEY,
+            name TEXT,
+            description TEXT,
+            full_description TEXT,
+            price_badge TEXT,
+            price REAL,
+            billing_period TEXT,
+            monthly_price REAL,
+            joined_count INTEGER,
+            minutes_spent TEXT,
+            founded_date TEXT,
+            whop_ranking INTEGER,
+            rating_stars INTEGER,
+            rating_count INTEGER,
+            profile_username TEXT,
+            profile_join_date TEXT,
+            profile_bio TEXT,
+            updated_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS community_categories (
+            url TEXT NOT NULL REFERENCES communities(url) ON DELETE CASCADE,
+            category TEXT NOT NULL,
+            PRIMARY KEY (url, category)
+        );
+        CREATE TABLE IF NOT EXISTS community_features (
+            url TEXT NOT NULL REFERENCES communities(url) ON DELETE CASCADE,
+            position INTEGER NOT NULL,
+            feature TEXT NOT NULL,
+            PRIMARY KEY (url, position)
+        );
+        CREATE TABLE IF NOT EXISTS social_links (
+            url TEXT NOT NULL REFERENCES communities(url) ON DELETE CASCADE,
+            source TEXT NOT NULL,
+            platform TEXT NOT NULL,
+            link TEXT NOT NULL,
+            PRIMARY KEY (url, source, platform)
+        );
+        CREATE INDEX IF NOT EXISTS idx_communities_name ON communities(name COLLATE NOCASE);
+        CREATE INDEX IF NOT EXISTS idx_communities_price ON communities(price);
+        CREATE INDEX IF NOT EXISTS idx_communities_monthly_price ON communities(monthly_price);
+        CREATE INDEX IF NOT EXISTS idx_communities_rating ON communities(rating_stars, rating_count);
+        CREATE INDEX IF NOT EXISTS idx_communities_ranking ON communities(whop_ranking);
+        CREATE INDEX IF NOT EXISTS idx_community_categories_category ON community_categories(category);
+        CREATE INDEX IF NOT EXISTS idx_social_links_platform ON social_links(platform);
+    """
+    
+    # Columns written from each community; None means "not scraped this run"
+    COLUMNS = [
+        'url', 'name', 'description', 'full_description', 'price_badge', 'price',
+        'billing_period', 'monthly_price',
+        'joined_count', 'minutes_spent', 'founded_date', 'whop_ranking', 'rating_stars',
+        'rating_count', 'profile_username', 'profile_join_date', 'profile_bio',
+        'updated_at',
+    ]
+    
+    # Columns parsed from price_badge; a one-time price has no monthly_price to keep
+    PRICE_COLUMNS = ('price_badge', 'price', 'billing_period', 'monthly_price')
+    
+    def __init__(self, db_path="whop_communities.db", batch_size=500):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(self.SCHEMA)
+    
+    def _community_row(self, community, updated_at):
+        """Map a scraped community dict onto the communities table columns"""
+        rating = community.get('rating') or {}
+        profile = community.get('profile_social_links') or {}
+        price, billing_period, monthly_price = parse_price(community.get('price_badge'))
+        return (
+            community['url'],
+            community.get('name'),
+            community.get('description'),
+            community.get('full_description'),
+            community.get('price_badge'),
+            price,
+            billing_period,
+            monthly_price,
+            parse_count(community.get('joined_count')),
+            community.get('minutes_spent'),
+            community.get('founded_date'),
+            parse_count(community.get('whop_ranking')),
+            rating.get('stars'),
+            parse_count(rating.get('count')),
+            profile.get('username'),
+            profile.get('join_date'),
+            profile.get('bio'),
+            updated_at,
+        )
+    
+    def upsert_communities(self, communities):
+        """
+        Insert or update communities, their categories, features and social links in batches
+        Returns:
+            int: Number of communities written
+        """
+        updated_at = datetime.now(timezone.utc).isoformat()
+        placeholders = ', '.join('?' for _ in self.COLUMNS)
+        # Keep the stored value when this run didn't scrape a field
+        updates = ', '.join(
+            f"{column} = COALESCE(excluded.{column}, communities.{column})"
+            for column in self.COLUMNS if column not in ('url', *self.PRICE_COLUMNS)
+        )
+        # Price fields are derived from one badge, so they are replaced together
+        updates += ''.join(
+            f", {column} = CASE WHEN excluded.price_badge IS NULL THEN communities.{column} "
+            f"ELSE excluded.{column} END"
+            for column in self.PRICE_COLUMNS
+        )
+        upsert_sql = (
+            f"INSERT INTO communities ({', '.join(self.COLUMNS)}) VALUES ({placeholders}) "
+            f"ON CONFLICT(url) DO UPDATE SET {updates}"
+        )
+        
+        for start in range(0, len(communities), self.batch_size):
+            batch = communities[start:start + self.batch_size]
+            
+            category_rows = []
+            feature_rows = []
+            link_rows = []
+            category_urls = []
+            feature_urls = []
+            link_urls = []
+            for community in batch:
+                if 'categories' in community:
+                    category_urls.append((community['url'],))
+                    category_rows.extend((community['url'], category) for category in community['categories'])
+                if 'features' in community:
+                    feature_urls.append((community['url'],))
+                    feature_rows.extend(
+                        (community['url'], position, feature)
+                        for position, feature in enumerate(community['features'])
+                    )
+                for source, key in (('page', 'social_links'), ('profile', 'profile_social_links')):
+                    if key not in community:
+                        continue
+                    link_urls.append((community['url'], source))
+                    for platform, link in community[key].items():
+                        platform = SOCIAL_KEY_ALIASES.get(platform, platform)
+                        if platform in SOCIAL_PLATFORMS:
+                            link_rows.append((community['url'], source, platform, link))
+            
+            with self.conn:
+                self.conn.executemany(upsert_sql, [self._community_row(c, updated_at) for c in batch])
+                # Replace child rows only for communities whose details were scraped this run
+                self.conn.executemany("DELETE FROM community_categories WHERE url = ?", category_urls)
+                self.conn.executemany("INSERT OR IGNORE INTO community_categories VALUES (?, ?)", category_rows)
+                self.conn.executemany("DELETE FROM community_features WHERE url = ?", feature_urls)
+                self.conn.executemany("INSERT INTO community_features VALUES (?, ?, ?)", feature_rows)
+                self.conn.executemany("DELETE FROM social_links WHERE url = ? AND source = ?", link_urls)
+                self.conn.executemany("INSERT OR REPLACE INTO social_links VALUES (?, ?, ?, ?)", link_rows)
+        
+        print(f"Upserted {len(communities)} communities into {self.db_path}")
+        return len(communities)
+    
+    def _fetch(self, where, params, order_by="whop_ranking IS NULL, whop_ranking", limit=None):
+        sql = f"SELECT * FROM communities WHERE {where} ORDER BY {order_by}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params = (*params, limit)
+        return [dict(row) for row in self.conn.execute(sql, params)]
+    
+    def get(self, url):
+        """Look up one community by URL, including its categories, features and social links"""
+        rows = self._fetch("url = ?", (url,))
+        if not rows:
+            return None
+        community = rows[0]
+        community['categories'] = [
+            row['category'] for row in self.conn.execute(
+                "SELECT category FROM community_categories WHERE url = ? ORDER BY category", (url,)
+            )
+        ]
+        community['features'] = [
+            row['feature'] for row in self.conn.execute(
+                "SELECT feature FROM community_features WHERE url = ? ORDER BY position", (url,)
+            )
+        ]
+        community['social_links'] = {}
+        for row in self.conn.execute("SELECT source, platform, link FROM social_links WHERE url = ?", (url,)):
+            community['social_links'].setdefault(row['source'], {})[row['platform']] = row['link']
+        return community
+    
+    def find_by_name(self, name, prefix=False, limit=50):
+        """Case-insensitive lookup by exact name, or by name prefix when prefix=True"""
+        if prefix:
+            escaped = name.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            return self._fetch("name LIKE ? ESCAPE '\\'", (escaped + '%',), limit=limit)
+        return self._fetch("name = ? COLLATE NOCASE", (name,), limit=limit)
+    
+    def find_by_category(self, category, limit=None):
+        """Communities listed in a leaderboard category"""
+        return self._fetch(
+            "url IN (SELECT url FROM community_categories WHERE category = ?)", (category,), limit=limit
+        )
+    
+    def find_by_price(self, min_price=None, max_price=None, billing_period=None, limit=None):
+        """
+        Communities whose price falls in [min_price, max_price]
+        
+        Recurring prices are compared as a normalized monthly rate, so $499/year matches
+        a band around $41.58. One-time prices have no monthly rate; pass
+        billing_period='one_time' to filter them on their listed price instead.
+        Args:
+            billing_period (str, optional): Only match this period, e.g. 'month', 'year', 'one_time'
+        """
+        column = 'price' if billing_period == 'one_time' else 'monthly_price'
+        where = f"{column} BETWEEN ? AND ?"
+        params = (min_price if min_price is not None else 0, max_price if max_price is not None else float('inf'))
+        if billing_period is not None:
+            where += " AND billing_period = ?"
+            params = (*params, billing_period)
+        return self._fetch(where, params, order_by=column, limit=limit)
+    
+    def find_by_rating(self, min_stars, min_count=0, limit=None):
+        """Communities rated at least min_stars, with at least min_count ratings"""
+        return self._fetch(
+            "rating_stars >= ? AND COALESCE(rating_count, 0) >= ?",
+            (min_stars, min_count),
+            order_by="rating_stars DESC, rating_count DESC",
+            limit=limit,
+        )
+    
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,106 @@
+import os
+import sys
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history import HistoryStore
+
+START = datetime(2026, 1, 1, 6, 0, tzinfo=timezone.utc)
+
+
+def day(n):
+    return START + timedelta(days=n)
+
+
+def record(url, joined, **fields):
+    return {'url': url, 'joined_count': f'{joined} joined', 'joined_count_value': joined, **fields}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore(str(tmp_path), rebase_every=3)
+
+
+def test_first_run_writes_base(store, tmp_path):
+    assert store.record_run([record('a', 100), record('b', 5)], when=day(0)) == 2
+    assert os.listdir(tmp_path) == ['base-20260101T060000Z.json']
+    assert set(store.as_of(day(0))) == {'a', 'b'}
+
+
+def test_deltas_only_store_changed_fields(store, tmp_path):
+    store.record_run([record('a', 100, name='A'), record('b', 5)], when=day(0))
+    assert store.record_run([record('a', 120, name='A'), record('b', 5)], when=day(1)) == 1
+    with open(tmp_path / 'deltas-20260101T060000Z.jsonl', encoding='utf-8') as f:
+        line = f.read()
+    assert '"name"' not in line
+    assert '"joined_count_value": 120' in line
+
+
+def test_as_of_reconstructs_each_day(store):
+    for n, joined in enumerate([100, 110, 130]):
+        store.record_run([record('a', joined)], when=day(n))
+    assert store.as_of('2026-01-01')['a']['joined_count_value'] == 100
+    assert store.as_of(date(2026, 1, 2))['a']['joined_count_value'] == 110
+    assert store.as_of(day(2).isoformat())['a']['joined_count_value'] == 130
+    assert store.as_of('2025-12-31') == {}
+
+
+def test_missing_fields_keep_previous_values(store):
+    store.record_run([record('a', 100, full_description='Signals')], when=day(0))
+    store.record_run([record('a', 101)], when=day(1))
+    assert store.as_of(day(1))['a']['full_description'] == 'Signals'
+
+
+def test_removed_communities_drop_out_and_can_return(store):
+    store.record_run([record('a', 100), record('b', 5)], when=day(0))
+    store.record_run([record('a', 100)], when=day(1))
+    assert set(store.as_of(day(0))) == {'a', 'b'}
+    assert set(store.as_of(day(1))) == {'a'}
+    store.record_run([record('a', 100), record('b', 7)], when=day(2))
+    assert store.as_of(day(2))['b']['joined_count_value'] == 7
+
+
+def test_rebase_boundary(store, tmp_path):
+    for n in range(5):
+        urls = ['a', 'b'] if n != 3 else ['a']
+        store.record_run([record(url, 100 + n) for url in urls], when=day(n))
+    bases = sorted(name for name in os.listdir(tmp_path) if name.startswith('base-'))
+    assert bases == ['base-20260101T060000Z.json', 'base-20260104T060000Z.json']
+    # Day 3 is the new base and already excludes 'b', which returns on day 4
+    assert set(store.as_of(day(3))) == {'a'}
+    assert store.as_of(day(2))['b']['joined_count_value'] == 102
+    assert store.as_of(day(4))['b']['joined_count_value'] == 104
+
+
+def test_series_across_bases(store):
+    joined = [100, 100, 120, 130, 130]
+    for n, value in enumerate(joined):
+        store.record_run([record('a', value)], when=day(n))
+    assert store.series('a', 'joined_count_value') == [
+        ('20260101T060000Z', 100),
+        ('20260103T060000Z', 120),
+        ('20260104T060000Z', 130),
+    ]
+
+
+def test_series_marks_removal(store):
+    store.record_run([record('a', 1), record('b', 5)], when=day(0))
+    store.record_run([record('a', 1)], when=day(1))
+    store.record_run([record('a', 1), record('b', 9)], when=day(2))
+    assert store.series('b', 'joined_count_value') == [
+        ('20260101T060000Z', 5),
+        ('20260102T060000Z', None),
+        ('20260103T060000Z', 9),
+    ]
+
+
+@pytest.mark.parametrize('when', [day(1), day(2), day(-10)])
+def test_out_of_order_run_rejected(store, when):
+    store.record_run([record('a', 100)], when=day(0))
+    store.record_run([record('a', 110)], when=day(2))
+    with pytest.raises(ValueError):
+        store.record_run([record('a', 1)], when=when)
+    assert store.as_of(day(5))['a']['joined_count_value'] == 110
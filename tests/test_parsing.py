@@ -0,0 +1,48 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsing import parse_count, parse_price
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('1.2K joined', 1200),
+    ('3,400 joined', 3400),
+    ('2M joined', 2000000),
+    ('Whop Ranking #12', 12),
+    ('', None),
+    (None, None),
+    ('joined', None),
+])
+def test_parse_count(text, expected):
+    assert parse_count(text) == expected
+
+
+@pytest.mark.parametrize('badge, expected', [
+    ('$49.99/month', (49.99, 'month', 49.99)),
+    ('$49 / mo', (49.0, 'month', 49.0)),
+    ('$10 monthly', (10.0, 'month', 10.0)),
+    ('$499 / year', (499.0, 'year', 41.58)),
+    ('$1,200/yr', (1200.0, 'year', 100.0)),
+    ('$5 per week', (5.0, 'week', 21.67)),
+    ('$30 every 3 months', (30.0, '3 months', 10.0)),
+    ('€25/month', (25.0, 'month', 25.0)),
+    ('$99 one-time', (99.0, 'one_time', None)),
+    ('$299 lifetime', (299.0, 'one_time', None)),
+    ('$20', (20.0, None, None)),
+    ('Free', (0.0, 'free', 0.0)),
+    ('  FREE  ', (0.0, 'free', 0.0)),
+    # Free-trial wording is not a free community
+    ('Free trial, then $49/month', (49.0, 'month', 49.0)),
+    ('$49/month · 7 days free', (49.0, 'month', 49.0)),
+    ('7-day free trial, then $49/month', (49.0, 'month', 49.0)),
+    ('14 days free then 30/month', (30.0, 'month', 30.0)),
+    ('', (None, None, None)),
+    (None, (None, None, None)),
+    ('Sold out', (None, None, None)),
+])
+def test_parse_price(badge, expected):
+    assert parse_price(badge) == expected
@@ -0,0 +1,110 @@
+import itertools
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from social_links import canonicalize_url, classify_link, is_profile_link
+
+# (href, aria-label, expected platform, expected canonical URL)
+CORPUS = [
+    # twitter / x
+    ('https://twitter.com/alphatraders', None, 'twitter', 'https://x.com/alphatraders'),
+    ('https://x.com/alphatraders/', None, 'twitter', 'https://x.com/alphatraders'),
+    ('https://x.com/alphatraders?s=21&t=abc', None, 'twitter', 'https://x.com/alphatraders'),
+    ('http://mobile.twitter.com/alphatraders', None, 'twitter', 'https://x.com/alphatraders'),
+    ('https://www.twitter.com/alphatraders#top', None, 'twitter', 'https://x.com/alphatraders'),
+    ('HTTPS://X.COM/AlphaTraders', None, 'twitter', 'https://x.com/AlphaTraders'),
+    # discord
+    ('https://discord.gg/abc123', None, 'discord', 'https://discord.gg/abc123'),
+    ('https://discord.com/invite/abc123/', None, 'discord', 'https://discord.gg/abc123'),
+    ('https://discordapp.com/invite/abc123', None, 'discord', 'https://discord.gg/abc123'),
+    ('https://discordapp.com/channels/1/2', None, 'discord', 'https://discord.com/channels/1/2'),
+    # youtube
+    ('https://youtu.be/dQw4w9WgXcQ', None, 'youtube', 'https://youtube.com/watch?v=dQw4w9WgXcQ'),
+    ('https://youtu.be/dQw4w9WgXcQ?si=share', None, 'youtube', 'https://youtube.com/watch?v=dQw4w9WgXcQ'),
+    ('https://m.youtube.com/@alphatraders', None, 'youtube', 'https://youtube.com/@alphatraders'),
+    ('https://www.youtube.com/@alphatraders/videos/', None, 'youtube', 'https://youtube.com/@alphatraders/videos'),
+    # instagram / tiktok / facebook / telegram
+    ('https://www.instagram.com/alphatraders/?igshid=xyz', None, 'instagram', 'https://instagram.com/alphatraders'),
+    ('https://instagr.am/alphatraders', None, 'instagram', 'https://instagr.am/alphatraders'),
+    ('https://www.TikTok.com/@alphatraders?utm_source=copy', None, 'tiktok', 'https://tiktok.com/@alphatraders'),
+    ('https://m.facebook.com/alphatraders?fbclid=1', None, 'facebook', 'https://facebook.com/alphatraders'),
+    ('https://fb.me/alphatraders', None, 'facebook', 'https://fb.me/alphatraders'),
+    ('https://m.me/alphatraders', None, 'facebook', 'https://m.me/alphatraders'),
+    ('https://t.me/alphachannel', None, 'telegram', 'https://t.me/alphachannel'),
+    # unknown domains, with and without aria-label fallback
+    ('https://alphatraders.com/?utm_source=whop&id=2#pricing', None, 'website', 'https://alphatraders.com?id=2'),
+    ('https://www.alphatraders.com/', None, 'website', 'https://www.alphatraders.com'),
+    ('https://netflix.com', None, 'website', 'https://netflix.com'),
+    ('https://notx.com/a', None, 'website', 'https://notx.com/a'),
+    ('https://linktr.ee/alpha', 'Follow us on Twitter', 'twitter', 'https://linktr.ee/alpha'),
+    ('https://redirect.example/abc', 'X', 'twitter', 'https://redirect.example/abc'),
+    ('https://redirect.example/abc', 'Xbox store', 'website', 'https://redirect.example/abc'),
+    ('https://redirect.example/abc', 'Join our Discord', 'discord', 'https://redirect.example/abc'),
+    # not web links: left unchanged and not classified
+    ('mailto:team@alphatraders.com', 'Email', None, 'mailto:team@alphatraders.com'),
+    ('javascript:void(0)', 'Twitter', None, 'javascript:void(0)'),
+    ('/relative/path', None, None, '/relative/path'),
+    ('tel:+15551234', None, None, 'tel:+15551234'),
+]
+
+
+@pytest.mark.parametrize('href, label, platform, url', CORPUS)
+def test_classify_link_corpus(href, label, platform, url):
+    assert classify_link(href, label) == (platform, url)
+
+
+HOST_VARIANTS = {
+    'twitter': ['twitter.com', 'www.twitter.com', 'mobile.twitter.com', 'x.com', 'www.x.com'],
+    'instagram': ['instagram.com', 'www.instagram.com', 'm.instagram.com'],
+    'youtube': ['youtube.com', 'www.youtube.com', 'm.youtube.com'],
+    'tiktok': ['tiktok.com', 'www.tiktok.com', 'm.tiktok.com'],
+    'facebook': ['facebook.com', 'www.facebook.com', 'm.facebook.com', 'fb.com'],
+}
+CANONICAL_HOSTS = {
+    'twitter': 'x.com',
+    'instagram': 'instagram.com',
+    'youtube': 'youtube.com',
+    'tiktok': 'tiktok.com',
+    'facebook': 'facebook.com',
+}
+SUFFIXES = ['', '/', '?utm_source=whop', '?utm_medium=x&fbclid=1', '#about', '/?igshid=1']
+
+
+@pytest.mark.parametrize('platform, host, scheme, suffix', [
+    (platform, host, scheme, suffix)
+    for platform, hosts in HOST_VARIANTS.items()
+    for host, scheme, suffix in itertools.product(hosts, ['http', 'https'], SUFFIXES)
+])
+def test_host_variants_collapse_to_one_url(platform, host, scheme, suffix):
+    canonical_host = 'fb.com' if host == 'fb.com' else CANONICAL_HOSTS[platform]
+    found, url = classify_link(f'{scheme}://{host}/alphatraders{suffix}')
+    assert found == platform
+    assert url == f'https://{canonical_host}/alphatraders'
+
+
+def test_canonicalize_is_idempotent():
+    for href, _, _, _ in CORPUS:
+        once = canonicalize_url(href)
+        assert canonicalize_url(once) == once
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('https://x.com/alphatraders', True),
+    ('https://discord.gg/abc123', True),
+    ('https://x.com/intent/tweet', False),
+    ('https://x.com/share', False),
+    ('https://facebook.com/sharer/sharer.php', False),
+    ('https://facebook.com/sharer.php', False),
+    ('https://t.me/share/url', False),
+    ('https://x.com/whop', False),
+    ('https://instagram.com/whop', False),
+    ('https://youtube.com/@whop', False),
+    ('https://tiktok.com/@whop', False),
+    ('https://youtube.com', False),
+])
+def test_is_profile_link(url, expected):
+    assert is_profile_link(url) is expected
@@ -0,0 +1,118 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlite_sink import SQLiteSink
+
+
+def community(url, **fields):
+    return {'url': url, 'name': url.title(), 'rating': {}, **fields}
+
+
+FULL = community(
+    'alpha',
+    name='Alpha Traders',
+    price_badge='$49.99/month',
+    joined_count='1.2K joined',
+    whop_ranking='Whop Ranking #4',
+    rating={'stars': 5, 'count': '(120)', 'days_ago': '3d'},
+    categories=['trading', 'sports-betting'],
+    full_description='Signals every day',
+    features=['Discord', 'Signals'],
+    social_links={'discord': 'https://discord.gg/alpha'},
+    profile_social_links={'x': 'https://x.com/alpha', 'username': 'al', 'bio': 'hi'},
+)
+
+
+@pytest.fixture
+def db(tmp_path):
+    sink = SQLiteSink(str(tmp_path / 'whop.db'), batch_size=2)
+    yield sink
+    sink.close()
+
+
+def test_wal_mode(db):
+    assert db.conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+
+def test_get_returns_normalized_children(db):
+    db.upsert_communities([FULL])
+    row = db.get('alpha')
+    assert row['price'] == 49.99
+    assert row['billing_period'] == 'month'
+    assert row['monthly_price'] == 49.99
+    assert row['joined_count'] == 1200
+    assert row['whop_ranking'] == 4
+    assert row['rating_count'] == 120
+    assert row['profile_username'] == 'al'
+    assert row['categories'] == ['sports-betting', 'trading']
+    assert row['features'] == ['Discord', 'Signals']
+    assert row['social_links'] == {
+        'page': {'discord': 'https://discord.gg/alpha'},
+        'profile': {'twitter': 'https://x.com/alpha'},
+    }
+    assert db.get('missing') is None
+
+
+def test_upsert_keeps_fields_the_run_did_not_fetch(db):
+    db.upsert_communities([FULL])
+    # Card-only data, e.g. a community skipped by the request budget
+    db.upsert_communities([community('alpha', name='Alpha Traders', joined_count='1.5K joined')])
+    row = db.get('alpha')
+    assert row['joined_count'] == 1500
+    assert row['full_description'] == 'Signals every day'
+    assert row['monthly_price'] == 49.99
+    assert row['features'] == ['Discord', 'Signals']
+    assert row['categories'] == ['sports-betting', 'trading']
+
+
+def test_upsert_replaces_children_and_price_together(db):
+    db.upsert_communities([FULL])
+    db.upsert_communities([community(
+        'alpha', price_badge='$99 one-time', categories=['trading'], features=['Mentoring'],
+    )])
+    row = db.get('alpha')
+    assert (row['price'], row['billing_period'], row['monthly_price']) == (99.0, 'one_time', None)
+    assert row['categories'] == ['trading']
+    assert row['features'] == ['Mentoring']
+
+
+def test_batches_larger_than_batch_size(db):
+    assert db.upsert_communities([community(f'c{i}', categories=['trading']) for i in range(5)]) == 5
+    assert len(db.find_by_category('trading')) == 5
+
+
+def test_find_by_name(db):
+    db.upsert_communities([FULL, community('beta', name='Beta_100%'), community('gamma', name='Betamax')])
+    assert [r['url'] for r in db.find_by_name('alpha traders')] == ['alpha']
+    assert sorted(r['url'] for r in db.find_by_name('beta', prefix=True)) == ['beta', 'gamma']
+    # LIKE wildcards in the query are matched literally
+    assert [r['url'] for r in db.find_by_name('Beta_1', prefix=True)] == ['beta']
+    assert db.find_by_name('Beta%', prefix=True) == []
+
+
+def test_find_by_price_uses_monthly_rate(db):
+    db.upsert_communities([
+        community('monthly', price_badge='$49/month'),
+        community('yearly', price_badge='$499/year'),
+        community('onetime', price_badge='$45 one-time'),
+        community('free', price_badge='Free'),
+        community('trial', price_badge='Free trial, then $29/month'),
+    ])
+    assert [r['url'] for r in db.find_by_price(0, 10)] == ['free']
+    assert [r['url'] for r in db.find_by_price(25, 50)] == ['trial', 'yearly', 'monthly']
+    assert [r['url'] for r in db.find_by_price(billing_period='year')] == ['yearly']
+    assert [r['url'] for r in db.find_by_price(0, 50, billing_period='one_time')] == ['onetime']
+
+
+def test_find_by_rating(db):
+    db.upsert_communities([
+        FULL,
+        community('few', rating={'stars': 5, 'count': '(3)'}),
+        community('low', rating={'stars': 2, 'count': '(400)'}),
+    ])
+    assert [r['url'] for r in db.find_by_rating(4)] == ['alpha', 'few']
+    assert [r['url'] for r in db.find_by_rating(4, min_count=20)] == ['alpha']